@@ -1,15 +1,201 @@
 import google.generativeai as genai
+from google.api_core import exceptions as google_exceptions
 from dotenv import load_dotenv
+from collections import deque, namedtuple
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
 import os
+import random
+import threading
 import time
 
 load_dotenv()
 
+PRIMARY_MODEL_NAME = os.getenv("GEMINI_MODEL", "models/gemini-2.5-flash-lite-preview-06-17")
+FALLBACK_MODEL_NAME = os.getenv("GEMINI_FALLBACK_MODEL", "models/gemini-2.0-flash")
+
+# Latency budget (seconds) for a single LLM call, including retries and fallback
+CALL_DEADLINE = 45
+ATTEMPT_TIMEOUT = 15
+FALLBACK_TIMEOUT = 15
+MAX_RETRIES = 2
+RETRY_BASE_DELAY = 0.5
+
+# Hedging: send a duplicate request once the primary is slower than the recent p95
+DEFAULT_HEDGE_DELAY = 4.0
+MIN_HEDGE_DELAY = 0.5
+MIN_LATENCY_SAMPLES = 5
+# Hedge no later than this share of the attempt budget, and only if at least
+# MIN_HEDGE_BUDGET seconds are left for the hedge to answer
+MAX_HEDGE_FRACTION = 0.5
+MIN_HEDGE_BUDGET = 2.0
+
+# The worker pool is shared by every Streamlit session. Abandoned requests keep
+# their thread until their own timeout, so hedges are capped and skipped when
+# that many are already in flight, leaving room for primary and fallback calls.
+MAX_WORKERS = 32
+HEDGE_SLOTS = 8
+
+TRANSIENT_ERRORS = (
+    google_exceptions.ServiceUnavailable,
+    google_exceptions.DeadlineExceeded,
+    google_exceptions.ResourceExhausted,
+    google_exceptions.InternalServerError,
+    google_exceptions.TooManyRequests,
+    TimeoutError,
+    ConnectionError,
+)
+
 genai.configure(api_key=os.getenv("GEMINI_API_KEY"))
-model = genai.GenerativeModel("models/gemini-2.5-flash-lite-preview-06-17")
+model = genai.GenerativeModel(PRIMARY_MODEL_NAME)
+fallback_model = genai.GenerativeModel(FALLBACK_MODEL_NAME)
 
-def get_resume_feedback(resume_text):
-    """Get structured feedback on resume using Gemini AI"""
+# source is one of "primary", "hedge" or "fallback"
+LLMResponse = namedtuple("LLMResponse", ["text", "source", "latency"])
+
+_executor = ThreadPoolExecutor(max_workers=MAX_WORKERS)
+_hedge_slots = threading.BoundedSemaphore(HEDGE_SLOTS)
+_latencies = deque(maxlen=50)
+_latency_lock = threading.Lock()
+# Every generate_resilient call as (source, latency), source "error" when it raised
+_call_log = deque(maxlen=500)
+
+class LLMCallError(Exception):
+    """Raised when neither the primary nor the fallback model answered in time"""
+
+def _hedge_delay():
+    """Delay before hedging, based on the p95 of recent primary latencies"""
+    with _latency_lock:
+        samples = sorted(_latencies)
+    if len(samples) < MIN_LATENCY_SAMPLES:
+        return DEFAULT_HEDGE_DELAY
+    p95 = samples[min(len(samples) - 1, int(len(samples) * 0.95))]
+    return max(MIN_HEDGE_DELAY, p95)
+
+def _call_model(gen_model, prompt, timeout):
+    """Run a single generate_content call and return its text"""
+    response = gen_model.generate_content(prompt, request_options={"timeout": timeout})
+    return response.text
+
+def _latency_recorder(submitted_at):
+    """Done-callback that records the primary's latency whether or not it won the race"""
+    def record(future):
+        # Only successes are sampled: a timeout's "latency" is just the budget and
+        # would push the p95 up to ATTEMPT_TIMEOUT, switching hedging off
+        if future.cancelled() or future.exception() is not None:
+            return
+        with _latency_lock:
+            _latencies.append(time.monotonic() - submitted_at)
+    return record
+
+def _hedged_call(prompt, timeout):
+    """Call the primary model, firing a hedge request if it is slower than usual"""
+    submitted_at = time.monotonic()
+    deadline_at = submitted_at + timeout
+    primary = _executor.submit(_call_model, model, prompt, timeout)
+    primary.add_done_callback(_latency_recorder(submitted_at))
+    sources = {primary: "primary"}
+
+    try:
+        hedge_at = min(_hedge_delay(), timeout * MAX_HEDGE_FRACTION)
+        done, _ = wait([primary], timeout=hedge_at)
+        hedge_timeout = deadline_at - time.monotonic()
+        if not done and hedge_timeout >= MIN_HEDGE_BUDGET and _hedge_slots.acquire(blocking=False):
+            hedge = _executor.submit(_call_model, model, prompt, hedge_timeout)
+            hedge.add_done_callback(lambda _: _hedge_slots.release())
+            sources[hedge] = "hedge"
+
+        pending = set(sources)
+        last_error = None
+        while pending:
+            remaining = deadline_at - time.monotonic()
+            if remaining <= 0:
+                break
+            done, pending = wait(pending, timeout=remaining, return_when=FIRST_COMPLETED)
+            for future in done:
+                try:
+                    text = future.result()
+                except Exception as e:
+                    last_error = e
+                    continue
+                return text, sources[future]
+
+        if last_error is not None:
+            raise last_error
+        raise TimeoutError(f"Primary model did not respond within {timeout:.1f}s")
+    finally:
+        # Drop requests still queued; running ones end at their own timeout
+        for future in sources:
+            future.cancel()
+
+def _log_call(source, latency):
+    """Record how a call was served and how long it took"""
+    with _latency_lock:
+        _call_log.append((source, latency))
+    if source == "error":
+        print(f"[LLM] call failed after {latency:.2f}s")
+    else:
+        print(f"[LLM] served by {source} in {latency:.2f}s")
+
+def get_call_stats():
+    """Summarize recent calls: count per source and p50/p95/p99 end-to-end latency"""
+    with _latency_lock:
+        calls = list(_call_log)
+    stats = {"calls": len(calls), "sources": {}}
+    for source, _ in calls:
+        stats["sources"][source] = stats["sources"].get(source, 0) + 1
+    latencies = sorted(latency for _, latency in calls)
+    for name, pct in (("p50", 0.50), ("p95", 0.95), ("p99", 0.99)):
+        stats[name] = latencies[min(len(latencies) - 1, int(len(latencies) * pct))] if latencies else None
+    return stats
+
+def generate_resilient(prompt, deadline=CALL_DEADLINE):
+    """Generate content with per-call deadlines, hedging, retries and model fallback
+
+    Returns an LLMResponse whose source says whether the answer came from the
+    primary request, a hedged duplicate or the fallback model. Every call is
+    also recorded for get_call_stats().
+    """
+    start = time.monotonic()
+    deadline_at = start + deadline
+    primary_deadline_at = deadline_at - min(FALLBACK_TIMEOUT, deadline / 2)
+    last_error = None
+
+    for attempt in range(MAX_RETRIES + 1):
+        remaining = primary_deadline_at - time.monotonic()
+        if remaining <= 0:
+            break
+        try:
+            text, source = _hedged_call(prompt, min(ATTEMPT_TIMEOUT, remaining))
+            latency = time.monotonic() - start
+            _log_call(source, latency)
+            return LLMResponse(text, source, latency)
+        except Exception as e:
+            last_error = e
+            if not isinstance(e, TRANSIENT_ERRORS):
+                break
+            # Full jitter backoff, never sleeping past the primary budget
+            backoff = random.uniform(0, RETRY_BASE_DELAY * 2 ** attempt)
+            time.sleep(max(0, min(backoff, primary_deadline_at - time.monotonic())))
+
+    print(f"Primary model failed ({last_error}), falling back to {FALLBACK_MODEL_NAME}")
+    remaining = max(deadline_at - time.monotonic(), 0.1)
+    future = _executor.submit(_call_model, fallback_model, prompt, remaining)
+    done, _ = wait([future], timeout=remaining)
+    if not done:
+        future.cancel()
+        _log_call("error", time.monotonic() - start)
+        raise LLMCallError(f"No model responded within {deadline}s") from last_error
+    try:
+        text = future.result()
+    except Exception as e:
+        _log_call("error", time.monotonic() - start)
+        raise LLMCallError(f"Fallback model failed: {e}") from e
+    latency = time.monotonic() - start
+    _log_call("fallback", latency)
+    return LLMResponse(text, "fallback", latency)
+
+def request_resume_feedback(resume_text):
+    """Get resume feedback as an LLMResponse, raising LLMCallError instead of returning an error string"""
     prompt = f"""
     Analyze this resume and provide structured feedback in the following format:
     
@@ -33,9 +219,12 @@ def get_resume_feedback(resume_text):
     Keep feedback concise and actionable.
     """
     
+    return generate_resilient(prompt)
+
+def get_resume_feedback(resume_text):
+    """Get structured feedback on resume using Gemini AI"""
     try:
-        response = model.generate_content(prompt)
-        return response.text
+        return request_resume_feedback(resume_text).text
     except Exception as e:
         return f"Error generating feedback: {str(e)}"
 
@@ -57,7 +246,7 @@ def extract_job_keywords_with_gemini(resume_text, top_n=10):
     """
     
     try:
-        response = model.generate_content(prompt)
+        response = generate_resilient(prompt)
         raw_keywords = response.text.strip()
         # Clean and deduplicate keywords
         keywords = [kw.strip() for kw in raw_keywords.split(',') if kw.strip()]
@@ -92,8 +281,8 @@ These keywords will be used to find relevant job opportunities that match your p
 """
     return report
 
-def suggest_skill_improvements(resume_text, keywords):
-    """Suggest additional skills based on current profile"""
+def request_skill_suggestions(resume_text, keywords):
+    """Return (suggestions, LLMResponse) for the profile, raising LLMCallError on failure"""
     prompt = f"""
     Based on this resume and extracted keywords: {', '.join(keywords)}
     
@@ -106,9 +295,14 @@ def suggest_skill_improvements(resume_text, keywords):
     Resume: {resume_text}
     """
     
+    response = generate_resilient(prompt)
+    suggestions = [skill.strip() for skill in response.text.split(',') if skill.strip()]
+    return suggestions[:7], response
+
+def suggest_skill_improvements(resume_text, keywords):
+    """Suggest additional skills based on current profile"""
     try:
-        response = model.generate_content(prompt)
-        suggestions = [skill.strip() for skill in response.text.split(',') if skill.strip()]
-        return suggestions[:7]
+        suggestions, _ = request_skill_suggestions(resume_text, keywords)
+        return suggestions
     except Exception as e:
         return ["Cloud Computing", "Machine Learning", "Docker", "Kubernetes", "MongoDB"]
@@ -1,7 +1,9 @@
 import os
+import re
 import csv
 import time
 import requests
+from collections import namedtuple
 from serpapi import GoogleSearch
 from dotenv import load_dotenv
 
@@ -12,6 +14,54 @@ API_KEY = os.getenv("SERPAPI_API_KEY")
 if not API_KEY:
     print("⚠️  Warning: SERPAPI_API_KEY not found. Job search functionality will be limited.")
 
+JobRecord = namedtuple("JobRecord", [
+    "title", "company", "location", "posted", "posted_days", "salary",
+    "matched_skills", "relevance_score", "apply_link", "description"
+])
+
+POSTED_UNIT_DAYS = {"minute": 1 / 1440, "hour": 1 / 24, "day": 1, "week": 7, "month": 30, "year": 365}
+
+def parse_posted_age(posted):
+    """Convert strings like '3 days ago' or '30+ days ago' to an age in days (None if unknown)"""
+    text = str(posted).strip().lower()
+    # "Recently" is the placeholder for a missing posting date, so it stays unknown
+    if text in ("just posted", "today"):
+        return 0.0
+    match = re.search(r"(\d+)\+?\s*(minute|hour|day|week|month|year)", text)
+    if not match:
+        return None
+    return int(match.group(1)) * POSTED_UNIT_DAYS[match.group(2)]
+
+def normalize_job(job):
+    """Convert a job dict (or any other value) into a JobRecord with fixed fields"""
+    if not isinstance(job, dict):
+        return JobRecord(str(job), "Unknown Company", "Unknown Location", "Unknown Date", None,
+                         "Not specified", "N/A", 0.0, None, "")
+
+    try:
+        relevance_score = float(job.get('relevance_score') or 0)
+    except (TypeError, ValueError):
+        relevance_score = 0.0
+
+    posted = job.get('posted') or job.get('date_posted') or job.get('posted_date') or 'Recently'
+    # search_jobs_from_skills uses '#' for "no link"; None renders as an empty link cell
+    apply_link = job.get('apply_link') or job.get('url') or job.get('link')
+    if apply_link == '#':
+        apply_link = None
+
+    return JobRecord(
+        title=job.get('title') or job.get('job_title') or job.get('position') or 'Position Available',
+        company=job.get('company') or job.get('company_name') or job.get('employer') or 'Company Not Specified',
+        location=job.get('location') or job.get('job_location') or job.get('place') or 'Location TBD',
+        posted=posted,
+        posted_days=parse_posted_age(posted),
+        salary=job.get('salary') or 'Not specified',
+        matched_skills=job.get('matched_skills') or job.get('skills') or '',
+        relevance_score=relevance_score,
+        apply_link=apply_link,
+        description=job.get('description') or ''
+    )
+
 def normalize_location(location):
     """Normalize location format for better search results"""
     # if not location or location.strip().lower() in ["remote", "anywhere"]:
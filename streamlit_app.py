@@ -2,8 +2,8 @@ import streamlit as st
 import os
 import tempfile
 from extractor import extract_resume_info, validate_resume_content
-from model import get_resume_feedback, generate_report, suggest_skill_improvements
-from scap import search_jobs, save_jobs_to_csv
+from model import request_resume_feedback, generate_report, request_skill_suggestions, get_call_stats
+from scap import search_jobs, save_jobs_to_csv, normalize_job, JobRecord
 import pandas as pd
 
 # Page configuration
@@ -55,6 +55,16 @@ if 'resume_text' not in st.session_state:
     st.session_state.resume_text = ""
 if 'keywords' not in st.session_state:
     st.session_state.keywords = []
+if 'resume_key' not in st.session_state:
+    st.session_state.resume_key = None
+if 'feedback' not in st.session_state:
+    st.session_state.feedback = None
+if 'suggestions' not in st.session_state:
+    st.session_state.suggestions = None
+if 'jobs_df' not in st.session_state:
+    st.session_state.jobs_df = None
+if 'jobs_csv' not in st.session_state:
+    st.session_state.jobs_csv = None
 
 # Main header
 st.markdown('<h1 class="main-header">🦖 ResumeRex</h1>', unsafe_allow_html=True)
@@ -77,6 +87,12 @@ with st.sidebar:
         st.metric("Resume Length", f"{len(st.session_state.resume_text.split())} words")
         st.metric("Keywords Found", len(st.session_state.keywords))
 
+    # Recent Gemini calls across sessions: tail latency and which path served them
+    llm_stats = get_call_stats()
+    if llm_stats["calls"]:
+        st.metric("Gemini p95 Latency", f"{llm_stats['p95']:.1f}s", help=f"p99: {llm_stats['p99']:.1f}s")
+        st.caption("Served by: " + ", ".join(f"{source} {count}" for source, count in llm_stats["sources"].items()))
+
 # File upload
 uploaded_file = st.file_uploader(
     "📤 Upload your Resume (PDF or TXT)", 
@@ -88,42 +104,140 @@ if uploaded_file:
     # Create columns for better layout
     col1, col2 = st.columns([2, 1])
     
+    # Only re-extract (and call Gemini) when a different file or keyword count is chosen
+    resume_key = (uploaded_file.name, uploaded_file.size, keyword_count)
+    
     with col1:
-        with st.spinner("🔄 Processing your resume..."):
-            try:
-                # Save uploaded file temporarily
-                with tempfile.NamedTemporaryFile(delete=False, suffix=f".{uploaded_file.name.split('.')[-1]}") as tmp_file:
-                    tmp_file.write(uploaded_file.read())
-                    temp_path = tmp_file.name
+        if st.session_state.resume_key != resume_key:
+            with st.spinner("🔄 Processing your resume..."):
+                try:
+                    # Save uploaded file temporarily
+                    with tempfile.NamedTemporaryFile(delete=False, suffix=f".{uploaded_file.name.split('.')[-1]}") as tmp_file:
+                        tmp_file.write(uploaded_file.read())
+                        temp_path = tmp_file.name
 
-                # Extract resume information
-                resume_text, keywords = extract_resume_info(temp_path, keyword_count)
+                    # Extract resume information
+                    resume_text, keywords = extract_resume_info(temp_path, keyword_count)
                 
-                # Validate resume content
-                if not validate_resume_content(resume_text):
-                    st.warning("⚠️ This doesn't appear to be a typical resume. Please check your file.")
+                    # Validate resume content
+                    if not validate_resume_content(resume_text):
+                        st.warning("⚠️ This doesn't appear to be a typical resume. Please check your file.")
                 
-                # Store in session state
-                st.session_state.resume_processed = True
-                st.session_state.resume_text = resume_text
-                st.session_state.keywords = keywords
+                    # Store in session state
+                    st.session_state.resume_processed = True
+                    st.session_state.resume_text = resume_text
+                    st.session_state.keywords = keywords
+                    st.session_state.resume_key = resume_key
+                    st.session_state.feedback = None
+                    st.session_state.suggestions = None
+                    st.session_state.jobs_df = None
+                    st.session_state.jobs_csv = None
                 
-                # Clean up temp file
-                if os.path.exists(temp_path):
-                    os.unlink(temp_path)
+                    # Clean up temp file
+                    if os.path.exists(temp_path):
+                        os.unlink(temp_path)
                 
-                st.success("✅ Resume processed successfully!")
+                    st.success("✅ Resume processed successfully!")
                 
-            except Exception as e:
-                st.error(f"❌ Error processing resume: {str(e)}")
-                # Clean up temp file in case of error
-                if 'temp_path' in locals() and os.path.exists(temp_path):
-                    os.unlink(temp_path)
+                except Exception as e:
+                    st.error(f"❌ Error processing resume: {str(e)}")
+                    # Clean up temp file in case of error
+                    if 'temp_path' in locals() and os.path.exists(temp_path):
+                        os.unlink(temp_path)
 
     with col2:
         if st.session_state.resume_processed:
             st.info(f"📊 **File:** {uploaded_file.name}\n\n📝 **Words:** {len(st.session_state.resume_text.split())}\n\n🏷️ **Keywords:** {len(st.session_state.keywords)}")
 
+# Labels shown in the sort box mapped to (JobRecord column, ascending by default)
+JOB_SORT_COLUMNS = {
+    "Relevance": ("relevance_score", False),
+    "Newest": ("posted_days", True),
+    "Title": ("title", True),
+    "Company": ("company", True),
+    "Location": ("location", True),
+}
+
+# Job results view, rendered from session state so it survives pagination reruns.
+# As a fragment, paging, sorting and filtering rerun only this function.
+@st.fragment
+def render_job_results():
+    """Render one page of the stored job results with filter, sort and paging controls"""
+    if st.session_state.jobs_df is None or st.session_state.jobs_df.empty:
+        return
+
+    st.subheader("💼 Job Matches")
+    jobs_df = st.session_state.jobs_df
+
+    filter_col, sort_col, order_col, size_col = st.columns([2, 1, 1, 1])
+    with filter_col:
+        job_filter = st.text_input("🔎 Filter results", placeholder="Title, company, location or skill")
+    with sort_col:
+        sort_label = st.selectbox("Sort by", list(JOB_SORT_COLUMNS))
+    with order_col:
+        st.write("")  # Spacing
+        reverse = st.checkbox("Reverse order")
+    with size_col:
+        page_size = st.selectbox("Per page", [10, 25, 50], index=0)
+
+    view_df = jobs_df
+    if job_filter:
+        text = job_filter.strip().lower()
+        mask = (
+            jobs_df[["title", "company", "location", "matched_skills"]]
+            .apply(lambda col: col.str.lower().str.contains(text, regex=False))
+            .any(axis=1)
+        )
+        view_df = jobs_df[mask]
+    # Jobs with an unknown posting date always go last
+    sort_column, ascending = JOB_SORT_COLUMNS[sort_label]
+    view_df = view_df.sort_values(sort_column, ascending=ascending != reverse,
+                                  kind="stable", na_position="last")
+
+    # Start from page 1 whenever the filter, sort or page size changes, and keep the
+    # keyed page widget's state in range before it is drawn
+    total_pages = max(1, -(-len(view_df) // page_size))
+    view_key = (job_filter, sort_label, reverse, page_size)
+    if st.session_state.get('jobs_view_key') != view_key:
+        st.session_state.jobs_view_key = view_key
+        st.session_state.jobs_page = 1
+    st.session_state.jobs_page = min(max(int(st.session_state.get('jobs_page', 1)), 1), total_pages)
+    page = st.number_input("Page", min_value=1, max_value=total_pages, step=1, key="jobs_page")
+    page_df = view_df.iloc[(page - 1) * page_size:page * page_size]
+
+    st.caption(f"Showing {len(page_df)} of {len(view_df)} jobs (page {page} of {total_pages})")
+    st.dataframe(
+        page_df.drop(columns=["description", "posted_days"]),
+        hide_index=True,
+        use_container_width=True,
+        column_config={
+            "title": "🎯 Title",
+            "company": "🏢 Company",
+            "location": "📍 Location",
+            "posted": "📅 Posted",
+            "salary": "💰 Salary",
+            "matched_skills": "Matched Skills",
+            "relevance_score": st.column_config.ProgressColumn(
+                "Relevance %", min_value=0, max_value=100, format="%.0f%%"
+            ),
+            "apply_link": st.column_config.LinkColumn("👥 Apply", display_text="Apply Now"),
+        },
+    )
+
+    # Download CSV option
+    csv_filename = st.session_state.jobs_csv
+    if csv_filename and os.path.exists(csv_filename):
+        try:
+            with open(csv_filename, 'rb') as file:
+                st.download_button(
+                    label="📥 Download Job Results (CSV)",
+                    data=file.read(),
+                    file_name=os.path.basename(csv_filename),
+                    mime="text/csv"
+                )
+        except Exception as e:
+            st.warning(f"⚠️ Could not create download button: {str(e)}")
+
 if st.session_state.resume_processed:
     
     # Resume Analysis Section
@@ -135,8 +249,12 @@ if st.session_state.resume_processed:
     with tab1:
         with st.spinner("🤖 Getting AI feedback..."):
             try:
-                feedback = get_resume_feedback(st.session_state.resume_text)
-                st.markdown(feedback)
+                # Only successful responses are cached; a failure raises and is retried next run
+                if st.session_state.feedback is None:
+                    st.session_state.feedback = request_resume_feedback(st.session_state.resume_text)
+                feedback = st.session_state.feedback
+                st.markdown(feedback.text)
+                st.caption(f"Served by {feedback.source} model request in {feedback.latency:.1f}s")
             except Exception as e:
                 st.error(f"❌ Error getting AI feedback: {str(e)}")
     
@@ -160,7 +278,11 @@ if st.session_state.resume_processed:
     with tab3:
         with st.spinner("💡 Generating skill suggestions..."):
             try:
-                suggestions = suggest_skill_improvements(st.session_state.resume_text, st.session_state.keywords)
+                if st.session_state.suggestions is None:
+                    st.session_state.suggestions = request_skill_suggestions(
+                        st.session_state.resume_text, st.session_state.keywords
+                    )
+                suggestions, suggestions_response = st.session_state.suggestions
                 st.subheader("💡 Recommended Skills to Learn")
                 st.write("Consider adding these trending skills to boost your profile:")
                 if suggestions:
@@ -168,6 +290,7 @@ if st.session_state.resume_processed:
                         st.write(f"• **{suggestion}**")
                 else:
                     st.info("No specific skill suggestions available at the moment.")
+                st.caption(f"Served by {suggestions_response.source} model request in {suggestions_response.latency:.1f}s")
             except Exception as e:
                 st.error(f"❌ Error generating skill suggestions: {str(e)}")
 
@@ -231,77 +354,23 @@ if st.session_state.resume_processed:
                             st.warning(f"Could not save to CSV: {str(e)}")
                             csv_saved = False
                         
-                        # Display jobs
-                        st.subheader("💼 Job Matches")
-                        
-                        # # Sort jobs by relevance if relevance_score exists
-                        # try:
-                        #     jobs.sort(key=lambda x: x.get('relevance_score', 0), reverse=True)
-                        # except (TypeError, KeyError):
-                        #     pass  # Keep original order if sorting fails
-                        
-                        for i, job in enumerate(jobs):
-                            # Debug: Print job structure to understand the data format
-                            
-                            
-                            # Handle different possible job data structures
-                            if isinstance(job, dict):
-                                title = job.get('title') or job.get('job_title') or job.get('position') or 'Position Available'
-                                company = job.get('company') or job.get('company_name') or job.get('employer') or 'Company Not Specified'
-                                location = job.get('location') or job.get('job_location') or job.get('place') or 'Location TBD'
-                                posted = job.get('posted') or job.get('date_posted') or job.get('posted_date') or 'Recently'
-                                apply_link = job.get('apply_link') or job.get('url') or job.get('link') or '#'
-                               
-                                matched_skills = job.get('matched_skills') or job.get('skills') or 'Skills matching resume'
-                            else:
-                                # If job is not a dict, try to handle it as a string or other format
-                                title = str(job)
-                                company = 'Unknown Company'
-                                location = 'Unknown Location'
-                                posted = 'Unknown Date'
-                                apply_link = '#'
-                        
-                                matched_skills = 'N/A'
-                            
-                       
-                            # Use Streamlit components instead of HTML for better compatibility
-                            with st.container():
-                                # Create a styled container using columns
-                                col1, col2 = st.columns([4, 1])
-                                
-                                with col1:
-                                    st.subheader(f"🎯 {title}")
-                                    st.write(f"**🏢 Company:** {company}")
-                                    st.write(f"**📍 Location:** {location}")
-                                    st.write(f"**📅 Posted:** {posted}")
-                                    
-                                
-                                with col2:
-                                    if apply_link != '#':
-                                        st.link_button("👥 Apply Now", apply_link)
-                                    else:
-                                        st.button("👥 Apply Now", disabled=True, help="No application link available")
-                                
-                                st.divider()
-                        
-                        # Download CSV option
-                        if csv_saved and os.path.exists(csv_filename):
-                            try:
-                                with open(csv_filename, 'rb') as file:
-                                    st.download_button(
-                                        label="📥 Download Job Results (CSV)",
-                                        data=file.read(),
-                                        file_name=f"jobs_{job_location.replace(' ', '_')}.csv",
-                                        mime="text/csv"
-                                    )
-                            except Exception as e:
-                                st.warning(f"⚠️ Could not create download button: {str(e)}")
+                        # Normalize once so pagination reruns only slice the stored frame
+                        st.session_state.jobs_df = pd.DataFrame(
+                            [normalize_job(job) for job in jobs], columns=JobRecord._fields
+                        )
+                        st.session_state.jobs_csv = csv_filename if csv_saved and os.path.exists(csv_filename) else None
+                        st.session_state.jobs_page = 1
                     else:
+                        st.session_state.jobs_df = None
+                        st.session_state.jobs_csv = None
                         st.warning("⚠️ No matching jobs found. Try:")
                         st.write("• Different keywords or location")
                         st.write("• Broader search terms")
                         st.write("• Different job titles")
                         
                 except Exception as e:
+                    st.session_state.jobs_df = None
+                    st.session_state.jobs_csv = None
                     st.error(f"❌ Error searching for jobs: {str(e)}")
 
+    render_job_results()